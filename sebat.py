@@ -10,18 +10,54 @@ import os
 from datetime import datetime
 import sys
 import platform
-from queue import Queue, Empty
+from queue import Queue, Empty, SimpleQueue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait as wait_futures
+from itertools import islice
 import re
 import random
 import string
+import shlex
+import stat as stat_module
+import mmap
 
 statuses = {}
-resolved_paths_cache = {}
 
-lock = threading.Lock()
+# Cursor-home + clear-screen escape; one write replaces the fork/exec of
+# os.system('clear') on every redraw (modern Windows terminals handle VT too)
+CLEAR_SEQ = "\x1b[H\x1b[2J"
+
+# Repaint frames in place: home the cursor, erase each line as it is
+# rewritten, then clear whatever the previous (longer) frame left below.
+# Avoids the blank-then-paint flicker of a full-screen clear per tick
+CURSOR_HOME = "\x1b[H"
+ERASE_LINE = "\x1b[K"
+ERASE_BELOW = "\x1b[J"
+
+# States that count as completed in the progress summaries
+DONE_SET = frozenset(("done", "skipped"))
 
-# Global verbose logging
+# Banner rules built once instead of a string multiply per completion
+BANNER_SEP = "-" * 60
+HEADER_SEP = "=" * 80
+
+lock = threading.Lock()
+status_cond = threading.Condition(lock)
+state_counts = {}
+# Bumped on every real status transition; redraw loops skip repainting
+# frames whose version they have already rendered
+_status_version = 0
+
+# Global verbose logging. Scan threads enqueue formatted lines and a single
+# writer thread owns the file, so logging never blocks the scan path on I/O
 verbose_log_file = None
+_log_queue = SimpleQueue()
+_log_writer_thread = None
+_LOG_SENTINEL = object()
+# Timestamp formatted at most once per second for log lines
+_ts_cache = [0, ""]
+# Prefix strings built once and reused on every verbose_log call
+_sid_prefix = None
+_workflow_prefix_cache = {None: ""}
 verbose_enabled = False
 progress_lines_count = 0
 scan_id = None  # Global scan ID for the current session
@@ -39,16 +75,15 @@ def get_scan_id():
         scan_id = generate_scan_id()
     return scan_id
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
 def format_file_size(size_bytes):
     """Format file size in human readable format (B, KB, MB, GB)"""
     if size_bytes < 1024:
         return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.1f} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes / (1024 * 1024):.1f} MB"
-    else:
-        return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+    # bit_length picks the 1024-power tier in one shift, no chained compares
+    tier = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (10 * tier)):.1f} {_SIZE_UNITS[tier]}"
 
 def show_logs_realtime(scan_id_filter=None):
     debug_dir = Path("debug")
@@ -73,40 +108,53 @@ def show_logs_realtime(scan_id_filter=None):
     print("-" * 80)
     
     try:
-        with open(log_path, 'r', encoding='utf-8') as f:
-            # Read existing content
-            content = f.read()
-            if content:
-                if scan_id_filter and scan_id_filter != 'all':
-                    # Filter content by scan ID
-                    lines = content.split('\n')
-                    filtered_lines = []
-                    for line in lines:
-                        if f"[SID:{scan_id_filter}]" in line:
-                            filtered_lines.append(line)
-                    if filtered_lines:
-                        print('\n'.join(filtered_lines))
-                    else:
+        with open(log_path, 'rb') as f:
+            needle = None
+            if scan_id_filter and scan_id_filter != 'all':
+                needle = f"[SID:{scan_id_filter}]".encode()
+            out = sys.stdout.buffer
+
+            # Scan existing content via mmap - find() jumps straight to each
+            # matching line instead of decoding and splitting the whole file
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                if needle:
+                    matched = False
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        pos = mm.find(needle)
+                        while pos != -1:
+                            line_start = mm.rfind(b'\n', 0, pos) + 1
+                            line_end = mm.find(b'\n', pos)
+                            if line_end == -1:
+                                line_end = len(mm)
+                            out.write(mm[line_start:line_end] + b'\n')
+                            matched = True
+                            pos = mm.find(needle, line_end)
+                    out.flush()
+                    if not matched:
                         print(f"[WARNING] No logs found for SID: {scan_id_filter}")
                         return
                 else:
-                    print(content)
-            
-            # Follow new content in real-time
+                    out.write(f.read(size))
+                    out.flush()
+                f.seek(size)
+
+            # Follow new content in real-time; pending holds any partial
+            # trailing line so filtering never splits a line across reads
+            pending = b''
             while True:
                 new_content = f.read()
                 if new_content:
-                    if scan_id_filter and scan_id_filter != 'all':
-                        # Filter new content by scan ID
-                        lines = new_content.split('\n')
-                        filtered_lines = []
+                    if needle:
+                        pending += new_content
+                        lines = pending.split(b'\n')
+                        pending = lines.pop()
                         for line in lines:
-                            if f"[SID:{scan_id_filter}]" in line:
-                                filtered_lines.append(line)
-                        if filtered_lines:
-                            print('\n'.join(filtered_lines))
+                            if needle in line:
+                                out.write(line + b'\n')
                     else:
-                        print(new_content, end='')
+                        out.write(new_content)
+                    out.flush()
                 time.sleep(0.1)
     except KeyboardInterrupt:
         print("\n[INFO] Log reading stopped")
@@ -119,19 +167,27 @@ def verbose_log(message, workflow_name=None):
     if not verbose_enabled:
         return
     
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    current_scan_id = get_scan_id()
-    scan_id_prefix = f"[SID:{current_scan_id}] "
-    workflow_prefix = f"[{workflow_name}] " if workflow_name else ""
-    log_message = f"[{timestamp}] {scan_id_prefix}{workflow_prefix}{message}"
-    
-    # Write to log file
+    # Re-format the timestamp only when the second changes; bursts of log
+    # lines inside one second reuse the cached string
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[1] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        _ts_cache[0] = now
+    timestamp = _ts_cache[1]
+    # The SID and workflow prefixes never change within a session, so
+    # build each one once instead of re-interpolating per call
+    global _sid_prefix
+    if _sid_prefix is None:
+        _sid_prefix = f"[SID:{get_scan_id()}] "
+    workflow_prefix = _workflow_prefix_cache.get(workflow_name)
+    if workflow_prefix is None:
+        workflow_prefix = f"[{workflow_name}] "
+        _workflow_prefix_cache[workflow_name] = workflow_prefix
+    log_message = f"[{timestamp}] {_sid_prefix}{workflow_prefix}{message}"
+    
+    # Hand off to the writer thread - enqueue only, no I/O here
     if verbose_log_file:
-        try:
-            verbose_log_file.write(log_message + "\n")
-            verbose_log_file.flush()  
-        except Exception as e:
-            print(f"Warning: Could not write to verbose log: {e}")
+        _log_queue.put(log_message + "\n")
 
 def list_log_files():
     debug_dir = Path("debug")
@@ -148,7 +204,7 @@ def list_log_files():
         return
     
     print("\n[INFO] Log File Status:")
-    print("=" * 80)
+    print(HEADER_SEP)
     
     mtime = datetime.fromtimestamp(log_path.stat().st_mtime)
     size = log_path.stat().st_size
@@ -158,24 +214,19 @@ def list_log_files():
     print(f"[TIME] Last Modified: {mtime.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"[SIZE] Size: {size_str}")
     
-    # Extract and display scan IDs from this file
+    # Extract and display scan IDs from this file; mmap keeps the whole
+    # file out of RAM and one compiled regex replaces the per-line finds
     try:
-        with open(log_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            scan_ids = set()
-            for line in content.split('\n'):
-                if '[SID:' in line:
-                    # Extract scan ID from line
-                    start = line.find('[SID:') + 5
-                    end = line.find(']', start)
-                    if start > 4 and end > start:
-                        scan_id = line[start:end]
-                        scan_ids.add(scan_id)
-            
-            if scan_ids:
-                print(f"[SCANS] Contains {len(scan_ids)} scan(s): {', '.join(sorted(scan_ids, reverse=True))}")
-            else:
-                print(f"[SCANS] No scan IDs found")
+        scan_ids = set()
+        with open(log_path, 'rb') as f:
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    scan_ids = {m.group(1).decode() for m in _SID_RE.finditer(mm)}
+
+        if scan_ids:
+            print(f"[SCANS] Contains {len(scan_ids)} scan(s): {', '.join(sorted(scan_ids, reverse=True))}")
+        else:
+            print(f"[SCANS] No scan IDs found")
     except Exception as e:
         print(f"[WARNING] Could not read file: {e}")
     
@@ -206,43 +257,77 @@ def clear_logs():
         print("[INFO] No log file found. Nothing to clear.")
         return
     
-    # Calculate size before clearing
-    size = log_path.stat().st_size
-    size_str = format_file_size(size)
-    
-    print(f"[INFO] Found log file with size: {size_str}")
-    print("[INFO] Clearing log file...")
-    
     try:
-        log_path.unlink()
+        if verbose_log_file:
+            # A scan in this process is still writing: truncate through the
+            # open handle so the writer thread keeps a valid fd (unlinking
+            # would leave it appending to an invisible file)
+            size = os.fstat(verbose_log_file.fileno()).st_size
+            size_str = format_file_size(size)
+            print(f"[INFO] Found log file with size: {size_str}")
+            print("[INFO] Clearing log file...")
+            verbose_log_file.truncate(0)
+            verbose_log_file.seek(0)
+        else:
+            size = log_path.stat().st_size
+            size_str = format_file_size(size)
+            print(f"[INFO] Found log file with size: {size_str}")
+            print("[INFO] Clearing log file...")
+            log_path.unlink()
         print(f"[SUCCESS] Cleared log file ({size_str} freed)")
         print("[INFO] New scans will create fresh log file")
     except Exception as e:
         print(f"[WARNING] Could not delete {log_filename}: {e}")
 
+def _verbose_log_writer():
+    # Single consumer for _log_queue: drains lines into the buffered file,
+    # flushing once a second of idleness instead of once per line
+    while True:
+        try:
+            line = _log_queue.get(timeout=1.0)
+        except Empty:
+            try:
+                verbose_log_file.flush()
+            except Exception:
+                pass
+            continue
+        if line is _LOG_SENTINEL:
+            break
+        try:
+            verbose_log_file.write(line)
+        except Exception as e:
+            print(f"Warning: Could not write to verbose log: {e}")
+
 def setup_verbose_logging():
-    global verbose_log_file, verbose_enabled
-    
+    global verbose_log_file, verbose_enabled, _log_writer_thread
+
     if not verbose_enabled:
         return
-    
+
     # Create debug folder if it doesn't exist
     debug_dir = Path("debug")
     debug_dir.mkdir(exist_ok=True)
-    
+
     # Use single log file - APPEND mode
     log_filename = "debug/sebatch_verbose.log"
-    
+
     try:
-        # Use append mode ('a') instead of write mode ('w')
-        verbose_log_file = open(log_filename, 'a', encoding='utf-8')
+        # Use append mode ('a') instead of write mode ('w'), with a large
+        # buffer so per-line writes stay in memory between periodic flushes
+        verbose_log_file = open(log_filename, 'a', encoding='utf-8', buffering=1 << 16)
+        _log_writer_thread = threading.Thread(target=_verbose_log_writer, daemon=True)
+        _log_writer_thread.start()
         verbose_log(f"Verbose logging started - Log file: {log_filename}")
     except Exception as e:
         print(f"Warning: Could not create verbose log file: {e}")
         verbose_log_file = None
 
 def cleanup_verbose_logging():
-    global verbose_log_file
+    global verbose_log_file, _log_writer_thread
+    if _log_writer_thread:
+        _log_queue.put(_LOG_SENTINEL)
+        _log_writer_thread.join()
+        _log_writer_thread = None
     if verbose_log_file:
         try:
             verbose_log_file.close()
@@ -251,26 +336,115 @@ def cleanup_verbose_logging():
         verbose_log_file = None
 
 def log_status(domain, step, status):
-    with lock:
-        key = f"{domain}::{step}"
-        statuses[key] = status
+    # Statuses are sharded per domain so readers only touch the shard they
+    # render, instead of contending on one flat dict. setdefault and the get
+    # below are GIL-atomic, so redundant updates bail out without the lock;
+    # only real transitions take it to keep the counters consistent.
+    domain_statuses = statuses.setdefault(domain, {})
+    if domain_statuses.get(step) == status:
+        return
+    global _status_version
+    with status_cond:
+        old = domain_statuses.get(step)
+        if old == status:
+            return
+        # Keep waiting/done counters incrementally so the printers don't rescan the dict
+        if old is not None:
+            state_counts[old] = state_counts.get(old, 1) - 1
+        state_counts[status] = state_counts.get(status, 0) + 1
+        domain_statuses[step] = status
+        _status_version += 1
+        # Wake the status printer only when something actually changed
+        status_cond.notify_all()
 
 def print_status(domains, steps, scan_name):
-    with lock:
-        # Always clear screen for clean progress display
-        os.system('cls' if os.name == 'nt' else 'clear')
-        
-        # Print progress at the top with scan ID
-        current_scan_id = get_scan_id()
-        print(f"Scan Progress ({scan_name}) [SID:{current_scan_id}]:\n")
+    # Readers walk per-domain status shards lock-free: single-key dict reads are
+    # atomic under the GIL and a slightly stale cell only delays one repaint
+    # Build the whole frame first; a single write with the clear sequence
+    # replaces the per-redraw os.system('clear') fork and per-line prints
+    current_scan_id = get_scan_id()
+    lines = [f"Scan Progress ({scan_name}) [SID:{current_scan_id}]:", ""]
+
+    # Hoist step names once per frame instead of per cell
+    step_names = [step['name'] for step in steps]
+    last_index = len(step_names) - 1
+
+    for domainx in domains:
+        domain = check_cidr(domainx)
+        domain_statuses = statuses.get(domain, {})
+        # Collect row fragments and join once; += on str reallocates the
+        # whole row for every step
+        parts = [f"{domain:25} |"]
+        for i, name in enumerate(step_names):
+            stat = domain_statuses.get(name, "waiting...")
+
+            # Format status for display
+            if stat == "waiting...":
+                status_display = "WAIT..."
+            elif stat == "running":
+                status_display = "RUN.."
+            elif stat == "done":
+                status_display = "DONE"
+            elif stat == "skipped":
+                status_display = "SKIP"
+            else:
+                status_display = stat.upper()
+
+            # Add step with status
+            parts.append(f" {name}({status_display})")
+
+            # Add arrow if not the last step
+            if i < last_index:
+                # Show ---> only if the NEXT step is running, otherwise just ---
+                next_stat = domain_statuses.get(step_names[i + 1], "waiting...")
+
+                if next_stat == "running":
+                    parts.append(" --->")
+                else:
+                    parts.append(" ---")
+
+        lines.append(''.join(parts))
+
+    waiting_count = state_counts.get("waiting...", 0)
+    done_count = state_counts.get("done", 0) + state_counts.get("skipped", 0)
+    lines.append(f"\n[WAITING: {waiting_count}] [DONE: {done_count}]\n")
+
+    frame = (ERASE_LINE + "\n").join(lines)
+    sys.stdout.write(CURSOR_HOME + frame + ERASE_LINE + "\n" + ERASE_BELOW)
+    sys.stdout.flush()
+
+def print_all_workflows_status(workflow_configs, current_domains):
+    # Same lock-free shard reads and single-write frame as print_status
+    current_scan_id = get_scan_id()
+    lines = []
+
+    for config in workflow_configs:
+        scan_name = config.get('name', 'Unknown Scan')
+        pipeline = config['pipeline']
+
+        lines.append(f"Scan Progress ({scan_name}) [SID:{current_scan_id}]:")
+        lines.append("")
 
-        for domainx in domains:
+        # Hoist step names once per frame instead of per cell
+        step_names = [step['name'] for step in pipeline]
+        last_index = len(step_names) - 1
+
+        # Count while rendering so the frame needs a single pass per workflow
+        workflow_waiting = 0
+        workflow_done = 0
+
+        for domainx in current_domains:
             domain = check_cidr(domainx)
-            line = f"{domain:25} |"
-            for i, step in enumerate(steps):
-                key = f"{domain}::{step['name']}"
-                stat = statuses.get(key, "waiting...")
-                
+            domain_statuses = statuses.get(domain, {})
+            # Row fragments joined once, same as print_status
+            parts = [f"{domain:25} |"]
+            for i, name in enumerate(step_names):
+                stat = domain_statuses.get(name, "waiting...")
+                if stat == "waiting...":
+                    workflow_waiting += 1
+                elif stat in DONE_SET:
+                    workflow_done += 1
+
                 # Format status for display
                 if stat == "waiting...":
                     status_display = "WAIT..."
@@ -282,215 +456,317 @@ def print_status(domains, steps, scan_name):
                     status_display = "SKIP"
                 else:
                     status_display = stat.upper()
-                
+
                 # Add step with status
-                line += f" {step['name']}({status_display})"
-                
+                parts.append(f" {name}({status_display})")
+
                 # Add arrow if not the last step
-                if i < len(steps) - 1:
+                if i < last_index:
                     # Show ---> only if the NEXT step is running, otherwise just ---
-                    next_step = steps[i + 1]
-                    next_key = f"{domain}::{next_step['name']}"
-                    next_stat = statuses.get(next_key, "waiting...")
-                    
+                    next_stat = domain_statuses.get(step_names[i + 1], "waiting...")
+
                     if next_stat == "running":
-                        line += " --->"
+                        parts.append(" --->")
                     else:
-                        line += " ---"
-            
-            print(line)
+                        parts.append(" ---")
 
-        waiting_count = sum(1 for s in statuses.values() if s == "waiting...")
-        done_count = sum(1 for s in statuses.values() if s == "done" or s == "skipped")
-        print(f"\n[WAITING: {waiting_count}] [DONE: {done_count}]\n")
+            lines.append(''.join(parts))
 
-def print_all_workflows_status(workflow_configs, current_domains):
-    with lock:
-        # Always clear screen for clean progress display
-        os.system('cls' if os.name == 'nt' else 'clear')
-        
-        current_scan_id = get_scan_id()
-        
-        for config in workflow_configs:
-            scan_name = config.get('name', 'Unknown Scan')
-            pipeline = config['pipeline']
-            
-            print(f"Scan Progress ({scan_name}) [SID:{current_scan_id}]:\n")
-            
-            for domainx in current_domains:
-                domain = check_cidr(domainx)
-                line = f"{domain:25} |"
-                for i, step in enumerate(pipeline):
-                    key = f"{domain}::{step['name']}"
-                    stat = statuses.get(key, "waiting...")
-                    
-                    # Format status for display
-                    if stat == "waiting...":
-                        status_display = "WAIT..."
-                    elif stat == "running":
-                        status_display = "RUN.."
-                    elif stat == "done":
-                        status_display = "DONE"
-                    elif stat == "skipped":
-                        status_display = "SKIP"
-                    else:
-                        status_display = stat.upper()
-                    
-                    # Add step with status
-                    line += f" {step['name']}({status_display})"
-                    
-                    # Add arrow if not the last step
-                    if i < len(pipeline) - 1:
-                        # Show ---> only if the NEXT step is running, otherwise just ---
-                        next_step = pipeline[i + 1]
-                        next_key = f"{domain}::{next_step['name']}"
-                        next_stat = statuses.get(next_key, "waiting...")
-                        
-                        if next_stat == "running":
-                            line += " --->"
-                        else:
-                            line += " ---"
-                
-                print(line)
-            
-            # Count statuses for this workflow only
-            workflow_waiting = 0
-            workflow_done = 0
-            for domainx in current_domains:
-                domain = check_cidr(domainx)
-                for step in pipeline:
-                    key = f"{domain}::{step['name']}"
-                    stat = statuses.get(key, "waiting...")
-                    if stat == "waiting...":
-                        workflow_waiting += 1
-                    elif stat in ["done", "skipped"]:
-                        workflow_done += 1
-            
-            print(f"\n[WAITING: {workflow_waiting}] [DONE: {workflow_done}]\n")
-            print("-" * 80 + "\n")
+        lines.append(f"\n[WAITING: {workflow_waiting}] [DONE: {workflow_done}]\n")
+        lines.append("-" * 80 + "\n")
+
+    frame = (ERASE_LINE + "\n").join(lines)
+    sys.stdout.write(CURSOR_HOME + frame + ERASE_LINE + "\n" + ERASE_BELOW)
+    sys.stdout.flush()
+
+# Commands containing any of these need a real shell (pipes, chaining,
+# redirects, globs, quoting); plain tool invocations can exec directly
+_SHELL_METACHARS = set("|&;<>()$`\\\"'*?[]{}~\n")
+
+# Matches every placeholder a step command can contain, so one sub() pass
+# resolves them all instead of one str.replace scan per placeholder
+_PLACEHOLDER_RE = re.compile(r'\{domain\}|\{output_file\}|(\w+)\.output_file(\*?)')
+
+# Bare step references (dependency detection only, no substitution)
+_STEP_REF_RE = re.compile(r'(\w+)\.output_file')
 
-def run_command(cmd):
-    return subprocess.run(cmd, shell=True, capture_output=True, text=True)
+# Scan-id markers in the verbose log (bytes: matched against mmap'd data)
+_SID_RE = re.compile(rb'\[SID:(\d+)\]')
+
+# Per-stream cap on captured tool output; only this much is logged/echoed
+# anyway, and tools that dump megabytes no longer get duplicated into RAM
+CAPTURE_LIMIT = 1 << 20
+
+def _read_capped(stream, limit):
+    data = stream.read(limit)
+    # Drain whatever remains so the child never blocks on a full pipe
+    while stream.read(1 << 16):
+        pass
+    return data
+
+def run_command(cmd, capture_limit=CAPTURE_LIMIT):
+    if any(c in _SHELL_METACHARS for c in cmd):
+        proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True)
+    else:
+        # No shell syntax: skip the /bin/sh fork and exec the tool directly.
+        # A missing binary must fail like the shell path does (rc 127 with
+        # the error on stderr), not raise out of the step
+        argv = shlex.split(cmd)
+        try:
+            proc = subprocess.Popen(argv, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, text=True)
+        except OSError as e:
+            return subprocess.CompletedProcess(
+                cmd, 127, '', f"{argv[0]}: {e.strerror or e}")
+
+    # stderr is drained on a side thread so neither pipe can fill up and
+    # stall the child while we read the other one
+    stderr_box = []
+    stderr_reader = threading.Thread(
+        target=lambda: stderr_box.append(_read_capped(proc.stderr, capture_limit)),
+        daemon=True)
+    stderr_reader.start()
+    stdout = _read_capped(proc.stdout, capture_limit)
+    stderr_reader.join()
+    returncode = proc.wait()
+    return subprocess.CompletedProcess(cmd, returncode, stdout,
+                                       stderr_box[0] if stderr_box else '')
 
 def is_output_valid(output_path_template, domain):
     if output_path_template == "null":
         return False
 
-    output_path = Path(output_path_template)
-
-    if not output_path.exists():
+    # One stat call answers existence, kind and size; for directories the
+    # first scandir entry is enough to prove non-emptiness
+    try:
+        st = os.stat(output_path_template)
+    except OSError:
         return False
 
-    if output_path.is_dir():
-        if not list(output_path.iterdir()):
-            return False
-    elif output_path.is_file():
-        if output_path.stat().st_size == 0:
-            return False
+    if stat_module.S_ISDIR(st.st_mode):
+        with os.scandir(output_path_template) as entries:
+            return next(entries, None) is not None
 
-    return True
+    return st.st_size > 0
+
+checked_cidr_cache = {}
 
 def check_cidr(target):
+    # Called once per domain on every redraw; memoize so repaints don't redo
+    # the same string scan/replace thousands of times per scan
+    cached = checked_cidr_cache.get(target)
+    if cached is None:
+        cached = target.replace('/', '-') if '/' in target else target
+        checked_cidr_cache[target] = cached
+    return cached
+
+def _target_weight(target):
+    """Rough cost estimate for a target: a CIDR block covers 2^(32-prefix)
+    hosts, a plain domain counts as one"""
     if '/' in target:
-        return target.replace('/', '-')  
-    return target  
+        try:
+            prefix = int(target.rsplit('/', 1)[1])
+        except ValueError:
+            return 1
+        if 0 <= prefix <= 32:
+            return 1 << (32 - prefix)
+    return 1
+
+step_dir_cache = {}
+
+def get_step_dir(domain, cat_base, step_name):
+    # The directory for a (domain, cat_base, step) never changes within a run;
+    # cache it instead of rebuilding the parts list on every path lookup
+    key = (domain, cat_base, step_name)
+    dir_path = step_dir_cache.get(key)
+    if dir_path is None:
+        if cat_base:
+            dir_path = os.path.join("results-scan", domain, cat_base, step_name)
+        else:
+            dir_path = os.path.join("results-scan", domain, step_name)
+        step_dir_cache[key] = dir_path
+    return dir_path
+
+output_path_cache = {}
 
 def get_output_path(domain, step, date_str):
     cat_base = (step.get("cat_base") or "").strip()
     step_name = step["name"]
     output_file = (step.get("output_file") or "").strip()
-    
-    parts = ["results-scan", domain]
-    if cat_base:
-        parts.append(cat_base)
-    parts.append(step_name)
-    dir_path = os.path.join(*parts)
-    
-    if output_file:
-        file_name = f"scan-at-{date_str}-{output_file}"
-    else:
-        file_name = f"scan-at-{date_str}"
-    
-    return os.path.join(dir_path, file_name)
+
+    # Called once for mkdir and again inside the scan for the same (domain,
+    # step, date); memoize so repeat lookups cost one dict probe
+    key = (domain, cat_base, step_name, output_file, date_str)
+    out_path = output_path_cache.get(key)
+    if out_path is None:
+        dir_path = get_step_dir(domain, cat_base, step_name)
+
+        if output_file:
+            file_name = f"scan-at-{date_str}-{output_file}"
+        else:
+            file_name = f"scan-at-{date_str}"
+
+        out_path = os.path.join(dir_path, file_name)
+        output_path_cache[key] = out_path
+    return out_path
+
+result_exists_cache = {}
+
+# Parents already created this run; steps sharing a cat_base directory would
+# otherwise re-issue the same mkdir for every (domain, step) pair
+created_dirs = set()
 
 def is_any_result_exists(domain, step):
     cat_base = (step.get("cat_base") or "").strip()
     step_name = step["name"]
-    parts = ["results-scan", domain]
-    if cat_base:
-        parts.append(cat_base)
-    parts.append(step_name)
-    dir_path = os.path.join(*parts)
-    if not os.path.exists(dir_path):
-        return False
-    for fname in os.listdir(dir_path):
-        if fname.startswith("scan-at-"):
-            return True
-    return False
+    # Memoized per workflow run (cleared in run_workflow); every check for a
+    # (domain, step) pair happens before that step executes, so a cached answer
+    # never goes stale within one workflow
+    cache_key = (domain, cat_base, step_name)
+    cached = result_exists_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    dir_path = get_step_dir(domain, cat_base, step_name)
+    try:
+        # scandir streams entries, so we can stop at the first scan file
+        # without listing the whole directory
+        with os.scandir(dir_path) as it:
+            exists = any(entry.name.startswith("scan-at-") for entry in it)
+    except FileNotFoundError:
+        exists = False
+    result_exists_cache[cache_key] = exists
+    return exists
+
+def prime_result_exists_cache(domain, pipeline):
+    """Fill result_exists_cache for every pipeline step with one walk of the
+    domain's results tree, so per-step checks become set lookups instead of
+    one scandir each"""
+    seen = set()
+    base = os.path.join("results-scan", domain)
+    try:
+        with os.scandir(base) as level1:
+            for entry1 in level1:
+                if not entry1.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    with os.scandir(entry1.path) as level2:
+                        for entry2 in level2:
+                            if entry2.is_dir(follow_symlinks=False):
+                                # cat_base/step layout
+                                try:
+                                    with os.scandir(entry2.path) as files:
+                                        if any(e.name.startswith("scan-at-") for e in files):
+                                            seen.add((entry1.name, entry2.name))
+                                except (FileNotFoundError, NotADirectoryError):
+                                    pass
+                            elif entry2.name.startswith("scan-at-"):
+                                # No cat_base: the step dir sits directly under the domain
+                                seen.add(("", entry1.name))
+                except (FileNotFoundError, NotADirectoryError):
+                    pass
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+
+    for step in pipeline:
+        cat_base = (step.get("cat_base") or "").strip()
+        step_name = step["name"]
+        result_exists_cache[(domain, cat_base, step_name)] = (cat_base, step_name) in seen
+
+# Previous-scan lookups walk the whole domain tree; memoize per
+# (domain, step, date) so repeated references don't re-walk it (cleared at
+# workflow start, like result_exists_cache)
+previous_output_cache = {}
+previous_outputs_cache = {}
+
+# Probe the caches with a single .get() against this sentinel: with -pw a
+# sibling workflow's startup clear() can land between an `in` test and the
+# subscript, turning a hit into a KeyError. None won't do as the miss marker
+# because find_previous_scan_output legitimately caches None
+_CACHE_MISS = object()
+
+# One recursive walk per domain feeds every previous-output lookup: maps
+# step dir name -> list of per-directory [(file name, path, mtime)] lists,
+# so K step references cost one walk instead of K rglob passes
+_domain_output_index = {}
+
+def _index_domain_outputs(domain):
+    # Single .get() probe: a concurrent workflow-start clear() between an
+    # `in` test and the subscript would raise KeyError (a built index is
+    # never None, so no sentinel needed here)
+    index = _domain_output_index.get(domain)
+    if index is not None:
+        return index
+    index = {}
+    stack = [os.path.join("results-scan", domain)]
+    while stack:
+        current = stack.pop()
+        files = None
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.startswith("scan-at-") and entry.is_file():
+                        if files is None:
+                            files = []
+                        files.append((entry.name, entry.path, entry.stat().st_mtime))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        if files:
+            index.setdefault(os.path.basename(current), []).append(files)
+    _domain_output_index[domain] = index
+    return index
 
 def find_previous_scan_output(domain, step_name, date_str):
     """Find output file from previous scans when step is not in current workflow"""
-    # Look for the step in results-scan directory
-    results_dir = Path("results-scan")
-    if not results_dir.exists():
-        return None
-    
-    domain_dir = results_dir / domain
-    if not domain_dir.exists():
-        return None
-    
-    # Search recursively for the step name
-    for category_dir in domain_dir.rglob("*"):
-        if category_dir.is_dir() and category_dir.name == step_name:
-            # Look for scan files in this directory
-            scan_files = []
-            for file_path in category_dir.iterdir():
-                if file_path.is_file() and file_path.name.startswith("scan-at-"):
-                    scan_files.append(file_path)
-            
-            if scan_files:
-                # Check if it's from today or find the most recent
-                today_files = [f for f in scan_files if date_str in f.name]
-                if today_files:
-                    # If multiple files today, return the first one (or could return all)
-                    return str(today_files[0])
-                else:
-                    # If not today, find the most recent file
-                    latest_file = max(scan_files, key=lambda x: x.stat().st_mtime)
-                    return str(latest_file)
-    
+    key = (domain, step_name, date_str)
+    result = previous_output_cache.get(key, _CACHE_MISS)
+    if result is not _CACHE_MISS:
+        return result
+    result = _find_previous_scan_output_uncached(domain, step_name, date_str)
+    previous_output_cache[key] = result
+    return result
+
+def _find_previous_scan_output_uncached(domain, step_name, date_str):
+    # Look the step up in the per-domain output index (built in one walk)
+    for scan_files in _index_domain_outputs(domain).get(step_name, []):
+        # Check if it's from today or find the most recent
+        today_files = [f for f in scan_files if date_str in f[0]]
+        if today_files:
+            # If multiple files today, return the first one (or could return all)
+            return today_files[0][1]
+        else:
+            # If not today, find the most recent file
+            return max(scan_files, key=lambda x: x[2])[1]
+
     return None
 
 def find_previous_scan_outputs_with_prefix(domain, step_name, date_str):
     """Find all output files from previous scans that match a pattern (for wildcard cases)"""
-    # Look for the step in results-scan directory
-    results_dir = Path("results-scan")
-    if not results_dir.exists():
-        return []
-    
-    domain_dir = results_dir / domain
-    if not domain_dir.exists():
-        return []
-    
+    key = (domain, step_name, date_str)
+    result = previous_outputs_cache.get(key, _CACHE_MISS)
+    if result is not _CACHE_MISS:
+        return result
+    result = _find_previous_scan_outputs_with_prefix_uncached(domain, step_name, date_str)
+    previous_outputs_cache[key] = result
+    return result
+
+def _find_previous_scan_outputs_with_prefix_uncached(domain, step_name, date_str):
     found_files = []
-    
-    # Search recursively for the step name
-    for category_dir in domain_dir.rglob("*"):
-        if category_dir.is_dir() and category_dir.name == step_name:
-            # Look for scan files in this directory
-            for file_path in category_dir.iterdir():
-                if file_path.is_file() and file_path.name.startswith("scan-at-"):
-                    # Check if it's from today or find the most recent
-                    if date_str in file_path.name:
-                        found_files.append(str(file_path))
-                    else:
-                        # If not today, include if it's the most recent
-                        scan_files = [f for f in category_dir.iterdir() if f.is_file() and f.name.startswith("scan-at-")]
-                        if scan_files:
-                            latest_file = max(scan_files, key=lambda x: x.stat().st_mtime)
-                            if str(latest_file) not in found_files:
-                                found_files.append(str(latest_file))
-    
+
+    # Look the step up in the per-domain output index (built in one walk)
+    for scan_files in _index_domain_outputs(domain).get(step_name, []):
+        for file_name, file_path, _mtime in scan_files:
+            # Check if it's from today or find the most recent
+            if date_str in file_name:
+                found_files.append(file_path)
+            else:
+                # If not today, include if it's the most recent
+                latest_file = max(scan_files, key=lambda x: x[2])[1]
+                if latest_file not in found_files:
+                    found_files.append(latest_file)
+
     return found_files
 
 def check_required_outputs_exist(domain, pipeline, selected_steps, date_str):
@@ -512,7 +788,7 @@ def check_required_outputs_exist(domain, pipeline, selected_steps, date_str):
             command = step['command']
             
             # Check for dependencies in the command
-            step_references = re.findall(r'(\w+)\.output_file', command)
+            step_references = _STEP_REF_RE.findall(command)
             for dep_step in step_references:
                 if dep_step not in selected_steps:  # Only check non-selected dependencies
                     required_steps.add(dep_step)
@@ -543,38 +819,35 @@ def directory_exists_for_step(domain, step):
     """Check if the directory structure already exists for a step"""
     cat_base = (step.get("cat_base") or "").strip()
     step_name = step["name"]
-    
-    parts = ["results-scan", domain]
-    if cat_base:
-        parts.append(cat_base)
-    parts.append(step_name)
-    dir_path = os.path.join(*parts)
-    
-    return os.path.exists(dir_path)
+    return os.path.exists(get_step_dir(domain, cat_base, step_name))
+
+# Shared pool for parallel step groups; steps are subprocess-bound so the
+# threads mostly sleep in wait(), but spawning one OS thread per step per
+# domain adds up fast on big fan-outs. Domain scans run on their own pool,
+# so group waiters never occupy a step slot and the pool can't deadlock.
+_step_executor = ThreadPoolExecutor(
+    max_workers=min(64, (os.cpu_count() or 4) * 4),
+    thread_name_prefix="step",
+)
 
 def execute_step_group(domain, step_group, date_str, skip_if_any_result=True, workflow_name=None, rescan_steps=None, resolved_paths_cache=None):
     """Execute a group of steps (parallel if possible)"""
     firstdomain = domain
     domain = check_cidr(domain)
-    
+
     if step_group['parallel'] and len(step_group['steps']) > 1:
         # Execute steps in parallel
         verbose_log(f"Executing {len(step_group['steps'])} steps in parallel for cat_base '{step_group['cat_base']}' on {domain}", workflow_name)
-        
+
         def execute_single_step(step):
             return execute_single_step_logic(domain, step, date_str, skip_if_any_result, workflow_name, rescan_steps, resolved_paths_cache)
-        
-        # Create threads for parallel execution
-        threads = []
-        for step in step_group['steps']:
-            t = threading.Thread(target=execute_single_step, args=(step,))
-            t.start()
-            threads.append(t)
-        
-        # Wait for all threads to complete
-        for t in threads:
-            t.join()
-        
+
+        # Run the group on the shared pool instead of one thread per step
+        futures = [_step_executor.submit(execute_single_step, step)
+                   for step in step_group['steps']]
+        for future in futures:
+            future.result()
+
         verbose_log(f"Completed parallel execution of {len(step_group['steps'])} steps for {domain}", workflow_name)
     else:
         # Execute steps sequentially
@@ -591,48 +864,52 @@ def execute_single_step_logic(domain, step, date_str, skip_if_any_result=True, w
     
     name = step["name"]
     actual_output_file_path = get_output_path(domain, step, date_str)
-    resolved_paths_cache[domain][name] = actual_output_file_path
-
-    cmd = step["command"]
-    cmd = cmd.replace("{domain}", firstdomain)
-
-    # Handle references to previous steps (this is simplified for parallel execution)
-    # In parallel mode, we assume dependencies are handled by the grouping logic
-    step_references = re.findall(r'(\w+)\.output_file', cmd)
-    
-    for step_name in step_references:
-        placeholder = f"{step_name}.output_file"
-        wildcard_placeholder = f"{step_name}.output_file*"
-        
-        if wildcard_placeholder in cmd:
-            if step_name in resolved_paths_cache[domain] and resolved_paths_cache[domain][step_name]:
-                resolved_output = resolved_paths_cache[domain][step_name]
-                cmd = cmd.replace(wildcard_placeholder, resolved_output + "*")
-                verbose_log(f"Replaced {wildcard_placeholder} with {resolved_output}* for {domain}", workflow_name)
-            else:
-                output_files = find_previous_scan_outputs_with_prefix(domain, step_name, date_str)
-                if output_files:
-                    file_pattern = " ".join(output_files)
-                    cmd = cmd.replace(wildcard_placeholder, file_pattern)
+    resolved_paths_cache[(domain, name)] = actual_output_file_path
+
+    # Resolve every placeholder in a single pass over the command instead of
+    # one full-string replace per reference (quadratic for long pipelines).
+    # In parallel mode, we assume dependencies are handled by the grouping logic.
+    # The verbose_enabled guards here and below skip building the f-string
+    # entirely when logging is off - this runs once per placeholder per step
+    def resolve_placeholder(match):
+        token = match.group(0)
+        if token == "{domain}":
+            return firstdomain
+        if token == "{output_file}":
+            return actual_output_file_path if actual_output_file_path else token
+
+        step_name = match.group(1)
+        wildcard = match.group(2)
+        resolved_output = resolved_paths_cache.get((domain, step_name))
+
+        if wildcard:
+            if resolved_output:
+                if verbose_enabled:
+                    verbose_log(f"Replaced {token} with {resolved_output}* for {domain}", workflow_name)
+                return resolved_output + "*"
+            output_files = find_previous_scan_outputs_with_prefix(domain, step_name, date_str)
+            if output_files:
+                if verbose_enabled:
                     verbose_log(f"Found previous scan outputs for {step_name}: {len(output_files)} files for {domain}", workflow_name)
-                else:
-                    verbose_log(f"Warning: Could not find output files for step '{step_name}' for domain {domain}", workflow_name)
-        
-        elif placeholder in cmd:
-            if step_name in resolved_paths_cache[domain] and resolved_paths_cache[domain][step_name]:
-                resolved_output = resolved_paths_cache[domain][step_name]
-                cmd = cmd.replace(placeholder, resolved_output)
-                verbose_log(f"Replaced {placeholder} with {resolved_output} for {domain}", workflow_name)
-            else:
-                previous_output = find_previous_scan_output(domain, step_name, date_str)
-                if previous_output:
-                    cmd = cmd.replace(placeholder, previous_output)
-                    verbose_log(f"Found previous scan output for {step_name}: {previous_output} for {domain}", workflow_name)
-                else:
-                    verbose_log(f"Warning: Could not find output file for step '{step_name}' for domain {domain}", workflow_name)
-
-    if actual_output_file_path:
-        cmd = cmd.replace("{output_file}", actual_output_file_path)
+                return " ".join(output_files)
+            verbose_log(f"Warning: Could not find output files for step '{step_name}' for domain {domain}", workflow_name)
+            return token
+
+        if resolved_output:
+            if verbose_enabled:
+                verbose_log(f"Replaced {token} with {resolved_output} for {domain}", workflow_name)
+            return resolved_output
+        previous_output = find_previous_scan_output(domain, step_name, date_str)
+        if previous_output:
+            if verbose_enabled:
+                verbose_log(f"Found previous scan output for {step_name}: {previous_output} for {domain}", workflow_name)
+            return previous_output
+        verbose_log(f"Warning: Could not find output file for step '{step_name}' for domain {domain}", workflow_name)
+        return token
+
+    cmd = _PLACEHOLDER_RE.sub(resolve_placeholder, step["command"])
+
+    if actual_output_file_path and verbose_enabled:
         verbose_log(f"Output file path: {actual_output_file_path} for {domain}", workflow_name)
 
     # Determine if this step should be rescanned
@@ -642,78 +919,104 @@ def execute_single_step_logic(domain, step, date_str, skip_if_any_result=True, w
         if rescan_steps is True:
             # Force rescan all steps
             should_rescan = True
-            verbose_log(f"Step {name} will run for {domain} (force rescan all)", workflow_name)
+            if verbose_enabled:
+                verbose_log(f"Step {name} will run for {domain} (force rescan all)", workflow_name)
         elif isinstance(rescan_steps, list):
             if name in rescan_steps:
                 # This step is in the rescan list
                 should_rescan = True
-                verbose_log(f"Step {name} will run for {domain} (selected for rescan)", workflow_name)
+                if verbose_enabled:
+                    verbose_log(f"Step {name} will run for {domain} (selected for rescan)", workflow_name)
             else:
                 # This step is not in the rescan list, check if it has output
                 this_step_has_output = is_any_result_exists(domain, step)
                 if this_step_has_output:
                     should_rescan = False
-                    verbose_log(f"Step {name} will be skipped for {domain} (output exists, not in rescan list)", workflow_name)
+                    if verbose_enabled:
+                        verbose_log(f"Step {name} will be skipped for {domain} (output exists, not in rescan list)", workflow_name)
                 else:
                     should_rescan = True
-                    verbose_log(f"Step {name} will run for {domain} (no output exists, not in rescan list)", workflow_name)
+                    if verbose_enabled:
+                        verbose_log(f"Step {name} will run for {domain} (no output exists, not in rescan list)", workflow_name)
     else:
         # Smart mode: check if output exists
         if skip_if_any_result and is_any_result_exists(domain, step):
             should_rescan = False
-            verbose_log(f"Step {name} will be skipped for {domain} (output exists in smart mode)", workflow_name)
+            if verbose_enabled:
+                verbose_log(f"Step {name} will be skipped for {domain} (output exists in smart mode)", workflow_name)
         else:
             should_rescan = True
-            verbose_log(f"Step {name} will run for {domain} (no output exists in smart mode)", workflow_name)
+            if verbose_enabled:
+                verbose_log(f"Step {name} will run for {domain} (no output exists in smart mode)", workflow_name)
     
     # If step should be skipped, mark it and return
     if not should_rescan:
         log_status(domain, name, "skipped")
         return
 
-    # Create output directory
+    # Create output directory (once per unique parent for the whole run)
     if should_rescan and actual_output_file_path:
-        if not directory_exists_for_step(domain, step):
-            Path(os.path.dirname(actual_output_file_path)).mkdir(parents=True, exist_ok=True)
-            verbose_log(f"Created output directory for {name} on {domain}", workflow_name)
-        else:
+        out_dir = os.path.dirname(actual_output_file_path)
+        if out_dir not in created_dirs:
+            os.makedirs(out_dir, exist_ok=True)
+            created_dirs.add(out_dir)
+            if verbose_enabled:
+                verbose_log(f"Created output directory for {name} on {domain}", workflow_name)
+        elif verbose_enabled:
             verbose_log(f"Output directory already exists for {name} on {domain}", workflow_name)
 
     log_status(domain, name, "running")
-    verbose_log(f"Executing step {name} for {domain}: {cmd}", workflow_name)
+    if verbose_enabled:
+        verbose_log(f"Executing step {name} for {domain}: {cmd}", workflow_name)
 
     result = run_command(cmd)
-    
+
     # Log command output
     if result.stdout:
-        verbose_log(f"Command output for {name} on {domain}: {result.stdout}", workflow_name)
+        if verbose_enabled:
+            verbose_log(f"Command output for {name} on {domain}: {result.stdout}", workflow_name)
         print(f"\n[OUTPUT] {name} on {domain}:")
         print(result.stdout)
     if result.stderr:
-        verbose_log(f"Command stderr for {name} on {domain}: {result.stderr}", workflow_name)
+        if verbose_enabled:
+            verbose_log(f"Command stderr for {name} on {domain}: {result.stderr}", workflow_name)
         print(f"\n[ERROR] {name} on {domain}:")
         print(result.stderr)
 
     log_status(domain, name, "done")
-    verbose_log(f"Completed step {name} for {domain}", workflow_name)
+    if verbose_enabled:
+        verbose_log(f"Completed step {name} for {domain}", workflow_name)
+
+# Global cap on concurrent domain scans (set in main); bounds the aggregate
+# of parallel workflows x parallel targets so stacked knobs can't thrash the host
+_scan_slots = None
 
-def scan_domain(domain, pipeline, date_str, skip_if_any_result=True, workflow_name=None, rescan_steps=None):
-    firstdomain = domain 
-    domain = check_cidr(domain)   
+def scan_domain(domain, pipeline, date_str, skip_if_any_result=True, workflow_name=None, rescan_steps=None, resolved_cache=None, step_groups=None):
+    if _scan_slots is None:
+        return _scan_domain_inner(domain, pipeline, date_str, skip_if_any_result, workflow_name, rescan_steps, resolved_cache, step_groups)
+    with _scan_slots:
+        return _scan_domain_inner(domain, pipeline, date_str, skip_if_any_result, workflow_name, rescan_steps, resolved_cache, step_groups)
 
-    global resolved_paths_cache
-    resolved_paths_cache.setdefault(domain, {})
+def _scan_domain_inner(domain, pipeline, date_str, skip_if_any_result=True, workflow_name=None, rescan_steps=None, resolved_cache=None, step_groups=None):
+    firstdomain = domain
+    domain = check_cidr(domain)
+
+    # The cache is owned by the calling workflow and flat-keyed on
+    # (domain, step) - one hash probe per lookup, no nested dicts, and no
+    # module global for parallel workflows to reset mid-scan
+    if resolved_cache is None:
+        resolved_cache = {}
 
     verbose_log(f"Starting scan for domain: {domain}", workflow_name)
 
-    # Analyze pipeline for parallel execution groups
-    step_groups = analyze_pipeline_dependencies(pipeline)
-    verbose_log(f"Pipeline analysis: {len(step_groups)} groups for {domain}", workflow_name)
-    
-    for i, group in enumerate(step_groups):
-        verbose_log(f"Group {i+1}: {len(group['steps'])} steps, cat_base='{group['cat_base']}', parallel={group['parallel']}", workflow_name)
-        for step in group['steps']:
-            verbose_log(f"  - {step['name']}", workflow_name)
+    # One walk answers "does any result exist" for every step of this domain
+    prime_result_exists_cache(domain, pipeline)
+
+    # Grouping depends only on the pipeline, so callers dispatching many
+    # domains analyze once and pass the result in; the fallback covers
+    # direct calls (e.g. the process-pool path)
+    if step_groups is None:
+        step_groups = analyze_pipeline_dependencies(pipeline)
 
     # If rescanning specific steps, determine which steps need to run
     required_steps = None
@@ -727,8 +1030,10 @@ def scan_domain(domain, pipeline, date_str, skip_if_any_result=True, workflow_na
                 break
         
         if target_index is not None:
-            required_steps = [step['name'] for step in pipeline[target_index:]]
-            verbose_log(f"Rescanning {target_step} - will execute: {required_steps}", workflow_name)
+            required_list = [step['name'] for step in pipeline[target_index:]]
+            verbose_log(f"Rescanning {target_step} - will execute: {required_list}", workflow_name)
+            # Membership is tested once per step below; use a set
+            required_steps = set(required_list)
 
     # Execute each group
     for group in step_groups:
@@ -742,61 +1047,170 @@ def scan_domain(domain, pipeline, date_str, skip_if_any_result=True, workflow_na
                     'steps': filtered_steps,
                     'parallel': len(filtered_steps) > 1 and group['parallel']
                 }
-                execute_step_group(domain, filtered_group, date_str, skip_if_any_result, workflow_name, rescan_steps, resolved_paths_cache)
+                execute_step_group(domain, filtered_group, date_str, skip_if_any_result, workflow_name, rescan_steps, resolved_cache)
         else:
-            execute_step_group(domain, group, date_str, skip_if_any_result, workflow_name, rescan_steps, resolved_paths_cache)
+            execute_step_group(domain, group, date_str, skip_if_any_result, workflow_name, rescan_steps, resolved_cache)
 
-def worker(domains, pipeline, scan_name, date_str, skip_if_any_result=True, all_workflows=None, all_domains=None, rescan_steps=None):
-    threads = []
-    for domain in domains:
-        t = threading.Thread(target=scan_domain, args=(domain, pipeline, date_str, skip_if_any_result, scan_name, rescan_steps))
-        t.start()
-        threads.append(t)
-
-    # Use different status display based on whether we're running parallel workflows
+def _drain_log_queue():
+    lines = []
+    try:
+        while True:
+            lines.append(_log_queue.get_nowait())
+    except Empty:
+        pass
+    return lines
+
+def _process_pool_init():
+    # Forked children inherit the parent's log queue but not its writer
+    # thread, so anything a child enqueues would pile up forever. Drop the
+    # lines the parent had queued but not yet written at fork time (the
+    # parent's writer still owns those); the child's own lines are drained
+    # and shipped back per task by scan_domain_in_process
+    _drain_log_queue()
+
+def scan_domain_in_process(domain, pipeline, date_str, skip_if_any_result=True, workflow_name=None, rescan_steps=None):
+    """Run scan_domain in a worker process and return its status updates.
+
+    Child processes cannot mutate the parent's statuses dict, so the final
+    per-step states are shipped back for the parent to ingest via log_status.
+    The child's verbose log lines ride along too: they sit on the inherited
+    queue with no writer thread here, so draining them per task keeps the
+    worker's memory flat and lets the parent write them to the real log.
+    """
+    scan_domain(domain, pipeline, date_str, skip_if_any_result, workflow_name, rescan_steps)
+    checked = check_cidr(domain)
+    step_states = [(checked, step_name, stat) for step_name, stat in statuses.get(checked, {}).items()]
+    return step_states, _drain_log_queue()
+
+def worker(domains, pipeline, scan_name, date_str, skip_if_any_result=True, all_workflows=None, all_domains=None, rescan_steps=None, max_workers=None, render=True, step_groups=None):
+    if max_workers is None:
+        max_workers = len(domains) or 1
+
+    last_version = -1
+    last_paint = 0.0
+
+    # The frame style never changes within one worker() call - bind the
+    # painter once instead of re-testing the mode on every repaint
     if all_workflows and all_domains:
-        print_all_workflows_status(all_workflows, all_domains)
+        paint = lambda: print_all_workflows_status(all_workflows, all_domains)
     else:
-        print_status(domains, pipeline, scan_name)
-
-    last_print = time.time()
-    while any(t.is_alive() for t in threads):
-        now = time.time()
-        if now - last_print > 1:
-            if all_workflows and all_domains:
-                print_all_workflows_status(all_workflows, all_domains)
-            else:
-                print_status(domains, pipeline, scan_name)
-            last_print = now
-        time.sleep(0.1)
+        paint = lambda: print_status(domains, pipeline, scan_name)
+
+    def refresh():
+        # With render=False a dedicated printer thread owns the screen and
+        # this worker never paints (parallel workflows would otherwise fight
+        # over the same frame)
+        if not render:
+            return
+        # Repaint only when a status changed since the last frame; a quiescent
+        # screen costs one integer compare per tick. A 5 s heartbeat still
+        # repaints occasionally so a resized/garbled terminal recovers
+        nonlocal last_version, last_paint
+        now = time.monotonic()
+        if _status_version == last_version and now - last_paint < 5.0:
+            return
+        last_version = _status_version
+        last_paint = now
+        paint()
+
+    # The pipeline is identical for every domain - the groups come
+    # precomputed from the config load, with a fallback for direct callers
+    if step_groups is None:
+        step_groups = analyze_pipeline_dependencies(pipeline)
+    verbose_log(f"Pipeline analysis: {len(step_groups)} groups", scan_name)
+    if verbose_enabled:
+        for i, group in enumerate(step_groups):
+            verbose_log(f"Group {i+1}: {len(group['steps'])} steps, cat_base='{group['cat_base']}', parallel={group['parallel']}", scan_name)
+            for step in group['steps']:
+                verbose_log(f"  - {step['name']}", scan_name)
+
+    # Bounded pool: threads are reused across domains instead of spawning one per domain
+    resolved_cache = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan") as executor:
+        future_domains = {
+            executor.submit(scan_domain, domain, pipeline, date_str, skip_if_any_result, scan_name, rescan_steps, resolved_cache, step_groups): domain
+            for domain in domains
+        }
+
+        refresh()
+        # Sleep on the status condition: log_status notifies on every real
+        # transition, so the loop wakes exactly when there is something new to
+        # paint (or at the 1 s heartbeat), then polls futures without blocking
+        pending = set(future_domains)
+        failures = []
+        while pending:
+            with status_cond:
+                status_cond.wait(timeout=1.0)
+            completed, pending = wait_futures(pending, timeout=0)
+            # Consume every result so a scan that raised doesn't fail
+            # silently: mark the domain's unfinished steps and report it
+            for future in completed:
+                try:
+                    future.result()
+                except Exception as e:
+                    domain = check_cidr(future_domains[future])
+                    domain_statuses = statuses.get(domain, {})
+                    for step in pipeline:
+                        if domain_statuses.get(step['name']) not in DONE_SET:
+                            log_status(domain, step['name'], "failed")
+                    verbose_log(f"Scan failed for {domain}: {e}", scan_name)
+                    failures.append((domain, e))
+            refresh()
 
     # Final status update
-    if all_workflows and all_domains:
-        print_all_workflows_status(all_workflows, all_domains)
-    else:
-        print_status(domains, pipeline, scan_name)
+    refresh()
+    # Errors go below the last frame, where the in-place repaint can't
+    # overwrite them
+    for domain, e in failures:
+        print(f"[ERROR] Scan failed for {domain}: {e}")
+
+# libyaml C loader when available (same output, much faster parse)
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+yaml_config_cache = {}
+
+def load_yaml_config(path):
+    """Parse a workflow YAML, cached by (path, mtime) so listing workflows and
+    then scanning doesn't parse the same files twice in one invocation"""
+    path = str(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    key = (path, mtime_ns)
+    config = yaml_config_cache.get(key)
+    if config is None:
+        with open(path) as f:
+            config = yaml.load(f, Loader=_YamlLoader)
+        # Derive the execution groups and step names once at parse time;
+        # pipelines are immutable after load, so scans, diagrams and rescan
+        # validation reuse the analysis
+        if isinstance(config, dict) and isinstance(config.get('pipeline'), list):
+            config['_step_groups'] = analyze_pipeline_dependencies(config['pipeline'])
+            config['_step_names'] = tuple(s['name'] for s in config['pipeline'])
+            config['_step_name_set'] = frozenset(config['_step_names'])
+        yaml_config_cache[key] = config
+    return config
 
 def load_configs(path):
     configs = []
     for yaml_path in Path(path).glob("*.yaml"):
-        with open(yaml_path) as f:
-            config = yaml.safe_load(f)
-            config['__file'] = yaml_path
-            configs.append(config)
+        config = load_yaml_config(yaml_path)
+        config['__file'] = yaml_path
+        configs.append(config)
     return configs
 
 def get_workflow_names():
     workflows = []
     for yaml_path in Path("scans-wf/").glob("*.yaml"):
         try:
-            with open(yaml_path) as f:
-                config = yaml.safe_load(f)
-                workflow_name = config.get('name', yaml_path.stem)
-                workflows.append({
-                    'name': workflow_name,
-                    'file': yaml_path.name,
-                    'description': config.get('description', 'No description')
-                })
+            config = load_yaml_config(yaml_path)
+            workflow_name = config.get('name', yaml_path.stem)
+            workflows.append({
+                'name': workflow_name,
+                'file': yaml_path.name,
+                'description': config.get('description', 'No description')
+            })
         except Exception as e:
             print(f"Warning: Could not load {yaml_path}: {e}")
     return workflows
@@ -823,118 +1237,164 @@ def show_workflow_names():
     print("  python sebat.py -t targets.txt  (runs all workflows)")
 
 def load_workflows_by_names(workflow_names):
-    all_workflows = get_workflow_names()
-    available_names = {w['name']: w['file'] for w in all_workflows}
-    
+    # One walk of scans-wf/: parse each file (cache-backed) and match by
+    # name, instead of listing every workflow and re-opening the requested
+    # ones in a second pass
+    available = {}
+    for yaml_path in Path("scans-wf/").glob("*.yaml"):
+        try:
+            config = load_yaml_config(yaml_path)
+        except Exception as e:
+            print(f"Warning: Could not load {yaml_path}: {e}")
+            continue
+        available[config.get('name', yaml_path.stem)] = (config, yaml_path)
+
     configs = []
     for name in workflow_names:
         name = name.strip()
-        if name in available_names:
-            file_path = f"scans-wf/{available_names[name]}"
-            try:
-                with open(file_path) as f:
-                    config = yaml.safe_load(f)
-                    config['__file'] = file_path
-                    configs.append(config)
-            except Exception as e:
-                print(f"[ERROR] Error loading workflow '{name}': {e}")
+        if name in available:
+            config, yaml_path = available[name]
+            config['__file'] = str(yaml_path)
+            configs.append(config)
         else:
             print(f"[ERROR] Workflow '{name}' not found!")
-            print(f"[TIP] Available workflows: {', '.join(available_names.keys())}")
-    
+            print(f"[TIP] Available workflows: {', '.join(available.keys())}")
+
     return configs
 
 def find_latest_scan_date():
-    results_dir = Path("results-scan")
-    if not results_dir.exists():
+    if not os.path.isdir("results-scan"):
         return None
-    
-    dates = set()
-    for domain_dir in results_dir.iterdir():
-        if domain_dir.is_dir():
-            for category_dir in domain_dir.rglob("*"):
-                if category_dir.is_dir():
-                    for file_path in category_dir.iterdir():
-                        if file_path.is_file() and file_path.name.startswith("scan-at-"):
-                            date_part = file_path.name.replace("scan-at-", "").split("-")[:3]
-                            if len(date_part) == 3:
-                                date_str = "-".join(date_part)
-                                dates.add(date_str)
-    
-    if dates:
-        return max(dates)  
-    return None
+
+    latest = None
+    # No scan file can be newer than today, so the first hit on today's date
+    # ends the walk early
+    today = datetime.now().strftime("%Y-%m-%d")
+    # Walk results-scan with scandir (no Path allocation, no extra stat per
+    # entry) and keep a running max; ISO dates compare lexicographically.
+    # A step directory accumulates files from several run dates, so every
+    # scan-at- entry has to be checked.
+    stack = ["results-scan"]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.startswith("scan-at-"):
+                        date_str = entry.name[8:18]
+                        if len(date_str) == 10:
+                            if latest is None or date_str > latest:
+                                latest = date_str
+                                if latest >= today:
+                                    return latest
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+
+    return latest
 
 def check_current_results(date_str):
-    results_dir = Path("results-scan")
-    if not results_dir.exists():
+    if not os.path.isdir("results-scan"):
         print("[ERROR] No results-scan directory found!")
         return
-    
+
     print(f"\n[RESULTS] Scan Results for Date: {date_str}")
     print("=" * 60)
-    
+
+    marker = f"scan-at-{date_str}"
+
+    # One scandir walk collects plain string tuples, sorted once afterwards,
+    # instead of sorting a fresh Path list at every directory level
+    domains = []
+    tool_files = []      # (domain, category, tool, file name, size, path)
+    category_files = []  # (domain, category, file name, size)
+    with os.scandir("results-scan") as domains_it:
+        for domain_entry in domains_it:
+            if not domain_entry.is_dir(follow_symlinks=False):
+                continue
+            domains.append(domain_entry.name)
+            with os.scandir(domain_entry.path) as cats_it:
+                for cat_entry in cats_it:
+                    if not cat_entry.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(cat_entry.path) as tools_it:
+                        for tool_entry in tools_it:
+                            if tool_entry.is_dir(follow_symlinks=False):
+                                with os.scandir(tool_entry.path) as files_it:
+                                    for file_entry in files_it:
+                                        if file_entry.is_file() and marker in file_entry.name:
+                                            tool_files.append((domain_entry.name, cat_entry.name,
+                                                               tool_entry.name, file_entry.name,
+                                                               file_entry.stat().st_size, file_entry.path))
+                            elif tool_entry.is_file() and marker in tool_entry.name:
+                                category_files.append((domain_entry.name, cat_entry.name,
+                                                       tool_entry.name, tool_entry.stat().st_size))
+
+    domains.sort()
+    tool_files.sort()
+    category_files.sort()
+
     found_results = False
     total_files = 0
-    
-    for domain_dir in sorted(results_dir.iterdir()):
-        if domain_dir.is_dir():
-            domain_name = domain_dir.name
-            domain_has_results = False
-            
-            print(f"\n[DOMAIN] Domain: {domain_name}")
-            print("-" * 40)
-            
-            for category_dir in sorted(domain_dir.iterdir()):
-                if category_dir.is_dir():
-                    category_name = category_dir.name
-                    category_has_results = False
-                    
-                    for tool_dir in sorted(category_dir.iterdir()):
-                        if tool_dir.is_dir():
-                            tool_name = tool_dir.name
-                            
-                            for file_path in tool_dir.iterdir():
-                                if file_path.is_file() and f"scan-at-{date_str}" in file_path.name:
-                                    file_size = file_path.stat().st_size
-                                    size_str = f"{file_size} bytes" if file_size < 1024 else f"{file_size/1024:.1f} KB"
-                                    
-                                    print(f"  [FILE] {category_name}/{tool_name}/")
-                                    print(f"      [DOC] {file_path.name} ({size_str})")
-                                    
-                                    try:
-                                        with open(file_path, 'r', encoding='utf-8') as f:
-                                            lines = f.readlines()[:5] 
-                                            if lines:
-                                                print("      [NOTE] Content preview:")
-                                                for line in lines:
-                                                    print(f"         {line.rstrip()}")
-                                                if len(f.readlines()) > 5:
-                                                    print("         ... (more content)")
-                                    except Exception as e:
-                                        print(f"      [WARNING]  Could not read file: {e}")
-                                    
-                                    print()
-                                    category_has_results = True
-                                    domain_has_results = True
-                                    found_results = True
-                                    total_files += 1
-                    
-                    if not category_has_results:
-                        for file_path in category_dir.iterdir():
-                            if file_path.is_file() and f"scan-at-{date_str}" in file_path.name:
-                                file_size = file_path.stat().st_size
-                                size_str = f"{file_size} bytes" if file_size < 1024 else f"{file_size/1024:.1f} KB"
-                                
-                                print(f"  [FILE] {category_name}/")
-                                print(f"      [DOC] {file_path.name} ({size_str})")
-                                print()
-                                domain_has_results = True
-                                found_results = True
-                                total_files += 1
-            
-            if not domain_has_results:
-                print("  [ERROR] No results found for this domain")
+
+    tool_by_domain = {}
+    for record in tool_files:
+        tool_by_domain.setdefault(record[0], []).append(record)
+    cat_by_domain = {}
+    for record in category_files:
+        cat_by_domain.setdefault(record[0], []).append(record)
+    # Category-level files are only shown when no tool under that category
+    # produced results, matching the old per-category fallback
+    cats_with_tool_results = {(record[0], record[1]) for record in tool_files}
+
+    for domain_name in domains:
+        domain_has_results = False
+
+        print(f"\n[DOMAIN] Domain: {domain_name}")
+        print("-" * 40)
+
+        for _, category_name, tool_name, file_name, file_size, file_path in tool_by_domain.get(domain_name, ()):
+            size_str = f"{file_size} bytes" if file_size < 1024 else f"{file_size/1024:.1f} KB"
+
+            print(f"  [FILE] {category_name}/{tool_name}/")
+            print(f"      [DOC] {file_name} ({size_str})")
+
+            try:
+                # Read at most 5 lines plus one probe line instead of
+                # slurping the whole file (the old second readlines()
+                # always saw an exhausted handle, so the "more content"
+                # marker never fired)
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    lines = list(islice(f, 5))
+                    if lines:
+                        print("      [NOTE] Content preview:")
+                        for line in lines:
+                            print(f"         {line.rstrip()}")
+                        if f.readline() != '':
+                            print("         ... (more content)")
+            except Exception as e:
+                print(f"      [WARNING]  Could not read file: {e}")
+
+            print()
+            domain_has_results = True
+            found_results = True
+            total_files += 1
+
+        for _, category_name, file_name, file_size in cat_by_domain.get(domain_name, ()):
+            if (domain_name, category_name) in cats_with_tool_results:
+                continue
+            size_str = f"{file_size} bytes" if file_size < 1024 else f"{file_size/1024:.1f} KB"
+
+            print(f"  [FILE] {category_name}/")
+            print(f"      [DOC] {file_name} ({size_str})")
+            print()
+            domain_has_results = True
+            found_results = True
+            total_files += 1
+
+        if not domain_has_results:
+            print("  [ERROR] No results found for this domain")
     
     if not found_results:
         print(f"[ERROR] No scan results found for date: {date_str}")
@@ -962,39 +1422,52 @@ def analyze_step_dependencies(pipeline, target_step_name):
     target_step = pipeline[target_index]
     target_command = target_step['command']
     
-    # Check for dependencies in the target step's command
+    # One regex scan of the command replaces a substring search per prior step
+    referenced = set(_STEP_REF_RE.findall(target_command))
     for i in range(target_index):
-        prev_step = pipeline[i]
-        prev_step_name = prev_step['name']
-        placeholder = f"{prev_step_name}.output_file"
-        if placeholder in target_command:
+        prev_step_name = pipeline[i]['name']
+        if prev_step_name in referenced:
             required_steps.append(prev_step_name)
     
     # Add the target step itself
     required_steps.append(target_step_name)
-    
+
     return required_steps
 
+def compute_steps_to_run(pipeline, rescan_steps):
+    """Resolve which step names a rescan will actually execute.
+
+    True means every step; a single-step rescan expands to that step plus
+    everything after it (downstream steps consume its output); a multi-step
+    list runs exactly the named steps. Returns None when not rescanning.
+    """
+    if rescan_steps is None:
+        return None
+    if rescan_steps is True:
+        return {step['name'] for step in pipeline}
+    if len(rescan_steps) == 1:
+        target_step = rescan_steps[0]
+        for i, step in enumerate(pipeline):
+            if step['name'] == target_step:
+                return {s['name'] for s in pipeline[i:]}
+    return set(rescan_steps)
+
 def analyze_pipeline_dependencies(pipeline):
     """Analyze pipeline to group steps for parallel execution within same cat_base"""
     step_groups = []
     current_group = []
     current_cat_base = None
-    
+    prev_names = set()
+
     for i, step in enumerate(pipeline):
         step_name = step['name']
         cat_base = (step.get('cat_base') or '').strip()
         command = step['command']
-        
-        # Check if this step depends on any previous step
-        has_dependencies = False
-        for j in range(i):
-            prev_step = pipeline[j]
-            prev_step_name = prev_step['name']
-            placeholder = f"{prev_step_name}.output_file"
-            if placeholder in command:
-                has_dependencies = True
-                break
+
+        # One regex scan of the command against the running prior-step set
+        # replaces a substring search per prior step (O(N^2) over the pipeline)
+        has_dependencies = not prev_names.isdisjoint(_STEP_REF_RE.findall(command))
+        prev_names.add(step_name)
         
         # If this step has dependencies, start a new group
         if has_dependencies:
@@ -1034,9 +1507,9 @@ def analyze_pipeline_dependencies(pipeline):
 
 def print_completion_message(date_str, total_domains, total_workflows):
     """Print a beautiful completion message with scan summary"""
-    print("\n" + "=" * 80)
+    print("\n" + HEADER_SEP)
     print("🎉 SCAN COMPLETED SUCCESSFULLY! 🎉")
-    print("=" * 80)
+    print(HEADER_SEP)
     print(f"📅 Scan Date: {date_str}")
     print(f"🎯 Total Domains: {total_domains}")
     print(f"⚙️  Total Workflows: {total_workflows}")
@@ -1053,7 +1526,7 @@ def print_completion_message(date_str, total_domains, total_workflows):
     print("   • Check results: python sebat.py -vl")
     print("   • List workflows: python sebat.py -sn")
     print()
-    print("=" * 80)
+    print(HEADER_SEP)
 
 def show_workflow_diagram(workflow_name):
     """Display a beautiful workflow diagram for a specific workflow"""
@@ -1069,126 +1542,113 @@ def show_workflow_diagram(workflow_name):
     description = config.get('description', 'No description')
     reference = config.get('reference', 'No reference')
     
-    # Analyze pipeline dependencies
-    step_groups = analyze_pipeline_dependencies(pipeline)
-    
-    print("\n" + "=" * 80)
-    print(f"WORKFLOW DIAGRAM: {workflow_name.upper()}")
-    print("=" * 80)
-    print(f"Description: {description}")
-    print(f"Reference: {reference}")
-    print(f"Total Steps: {len(pipeline)}")
-    print(f"Execution Groups: {len(step_groups)}")
-    print()
-    
-    # Display beautiful ASCII WORKFLOW
-    print("WORKFLOW DIAGRAM:")
-    print()
-    
+    # Execution groups were precomputed when the config was parsed
+    step_groups = config.get('_step_groups') or analyze_pipeline_dependencies(pipeline)
+    
+    # Build the whole diagram as a list and emit it with one write; a big
+    # pipeline would otherwise pay a locked, flushed print per line
+    indent = " " * 20
+    arrow = indent + "     │\n" + indent + "     ▼"
+    out = ["\n" + HEADER_SEP,
+           f"WORKFLOW DIAGRAM: {workflow_name.upper()}",
+           HEADER_SEP,
+           f"Description: {description}",
+           f"Reference: {reference}",
+           f"Total Steps: {len(pipeline)}",
+           f"Execution Groups: {len(step_groups)}",
+           "",
+           "WORKFLOW DIAGRAM:",
+           ""]
+
     # Calculate the maximum step name length for proper box sizing
     max_step_length = 0
     for group in step_groups:
         for step in group['steps']:
             max_step_length = max(max_step_length, len(step['name']))
-    
+
     # Ensure minimum width
     box_width = max(max_step_length + 4, 12)
-    
+    box_top = indent + "┌" + "─" * box_width + "┐"
+    box_bottom = indent + "└" + "─" * box_width + "┘"
+
     # Start with target
-    print(" " * 20 + "┌─────────┐")
-    print(" " * 20 + "│  TARGET │")
-    print(" " * 20 + "└─────────┘")
-    print(" " * 20 + "     │")
-    print(" " * 20 + "     ▼")
-    
+    out.append(indent + "┌─────────┐")
+    out.append(indent + "│  TARGET │")
+    out.append(indent + "└─────────┘")
+    out.append(arrow)
+
+    def box_row(step_name):
+        # Format-spec centering does the padding math in C and pads the
+        # odd space on the right like the old manual math (str.center
+        # flips the bias for odd widths)
+        return f"{indent}│{step_name:^{box_width}}│"
+
     for i, group in enumerate(step_groups):
-        group_name = group['cat_base'] if group['cat_base'] else 'general'
         steps = group['steps']
-        
+
         if len(steps) == 1:
             # Single step - simple flow
-            step = steps[0]
-            step_name = step['name']
-            
-            # Center the step name in the box
-            padding = (box_width - len(step_name)) // 2
-            left_pad = padding
-            right_pad = box_width - len(step_name) - left_pad
-            
-            print(" " * 20 + "┌" + "─" * box_width + "┐")
-            print(" " * 20 + "│" + " " * left_pad + step_name + " " * right_pad + "│")
-            print(" " * 20 + "└" + "─" * box_width + "┘")
-            
+            out.append(box_top)
+            out.append(box_row(steps[0]['name']))
+            out.append(box_bottom)
+
             if i < len(step_groups) - 1:
-                print(" " * 20 + "     │")
-                print(" " * 20 + "     ▼")
-        
+                out.append(arrow)
+
+        elif group['parallel']:
+            # Parallel execution - one box listing every step
+            out.append(box_top)
+            for step in steps:
+                out.append(box_row(step['name']))
+            out.append(box_bottom)
+            out.append(arrow)
         else:
-            # Multiple steps - show parallel execution
-            if group['parallel']:
-                # Parallel execution
-                print(" " * 20 + "┌" + "─" * box_width + "┐")
-                
-                for j, step in enumerate(steps):
-                    step_name = step['name']
-                    padding = (box_width - len(step_name)) // 2
-                    left_pad = padding
-                    right_pad = box_width - len(step_name) - left_pad
-                    
-                    print(" " * 20 + "│" + " " * left_pad + step_name + " " * right_pad + "│")
-                
-                print(" " * 20 + "└" + "─" * box_width + "┘")
-                print(" " * 20 + "     │")
-                print(" " * 20 + "     ▼")
-            else:
-                # Sequential execution within group
-                for j, step in enumerate(steps):
-                    step_name = step['name']
-                    padding = (box_width - len(step_name)) // 2
-                    left_pad = padding
-                    right_pad = box_width - len(step_name) - left_pad
-                    
-                    print(" " * 20 + "┌" + "─" * box_width + "┐")
-                    print(" " * 20 + "│" + " " * left_pad + step_name + " " * right_pad + "│")
-                    print(" " * 20 + "└" + "─" * box_width + "┘")
-                    
-                    if j < len(steps) - 1:
-                        print(" " * 20 + "     │")
-                        print(" " * 20 + "     ▼")
-                    elif i < len(step_groups) - 1:
-                        print(" " * 20 + "     │")
-                        print(" " * 20 + "     ▼")
-    
-    print(" " * 20 + "┌─────────┐")
-    print(" " * 20 + "│ RESULTS │")
-    print(" " * 20 + "└─────────┘")
+            # Sequential execution within group
+            for j, step in enumerate(steps):
+                out.append(box_top)
+                out.append(box_row(step['name']))
+                out.append(box_bottom)
+
+                if j < len(steps) - 1 or i < len(step_groups) - 1:
+                    out.append(arrow)
+
+    out.append(indent + "┌─────────┐")
+    out.append(indent + "│ RESULTS │")
+    out.append(indent + "└─────────┘")
+    sys.stdout.write("\n".join(out) + "\n")
 
 def validate_rescan_steps(step_names, configs):
-    """Validate that the provided step names exist in the workflows"""
+    """Validate that the provided step names exist in the workflows.
+
+    Always returns (is_valid, invalid_steps, workflow_steps) so callers
+    never have to probe the tuple length.
+    """
     if not step_names:
-        return True, []
-    
+        return True, [], {}
+
     all_steps = set()
     workflow_steps = {}
-    
+
     for config in configs:
         workflow_name = config.get('name', 'Unknown')
-        pipeline = config.get('pipeline', [])
-        workflow_steps[workflow_name] = [step['name'] for step in pipeline]
-        all_steps.update(workflow_steps[workflow_name])
-    
+        # Step names were materialized when the config was parsed
+        names = config.get('_step_names')
+        if names is None:
+            names = [step['name'] for step in config.get('pipeline', [])]
+        workflow_steps[workflow_name] = names
+        all_steps.update(config.get('_step_name_set', names))
+
     invalid_steps = [step for step in step_names if step not in all_steps]
-    
-    if invalid_steps:
-        return False, invalid_steps, workflow_steps
-    
-    return True, []
+
+    return not invalid_steps, invalid_steps, workflow_steps
 
 def main():
     parser = argparse.ArgumentParser(description="Batching scan engine")
     parser.add_argument("-t", "--targets", help="Target domains file")
     parser.add_argument("-pt", "--parallel-targets", type=int, default=3, help="Number of targets to process in parallel")
     parser.add_argument("-pw", "--parallel-workflows", type=int, default=1, help="Number of workflows to process in parallel")
+    parser.add_argument("-pm", "--parallel-mode", choices=["thread", "process"], default="thread", help="Run targets in threads (default) or separate processes")
+    parser.add_argument("-tp", "--total-parallel", type=int, default=None, help="Cap concurrent domain scans across all workflows (default: parallel_targets x parallel_workflows, at most 2x CPU count)")
     parser.add_argument("-rs", "--rescan", nargs='?', const=True, metavar='STEP', help="Force re-scan. Use -rs to rescan all steps, or -rs STEP_NAME to rescan specific step only")
     parser.add_argument("-sn", "--show-names", action="store_true", help="Show available workflow names")
     parser.add_argument("-sw", "--show-workflow", metavar='WORKFLOW_NAME', help="Show beautiful workflow diagram for specific workflow")
@@ -1228,6 +1688,11 @@ def main():
     with open(args.targets) as f:
         all_domains = [line.strip() for line in f if line.strip()]
 
+    # Largest targets first (LPT scheduling): a /16 that starts last would
+    # otherwise stretch the wall clock on its own once the pool drains.
+    # Plain domains all weigh the same, so their input order is preserved
+    all_domains.sort(key=_target_weight, reverse=True)
+
     verbose_log(f"Loaded {len(all_domains)} targets from {args.targets}")
 
     if args.workflow:
@@ -1263,21 +1728,14 @@ def main():
             step_names = [name.strip() for name in args.rescan.split(',')]
             
             # Validate step names
-            validation_result = validate_rescan_steps(step_names, configs)
-            if len(validation_result) == 2:
-                is_valid, _ = validation_result
-                if not is_valid:
-                    print(f"[ERROR] Invalid step name(s): {', '.join(step_names)}")
-                    return
-            else:
-                is_valid, invalid_steps, workflow_steps = validation_result
-                if not is_valid:
-                    print(f"[ERROR] Invalid step name(s): {', '.join(invalid_steps)}")
-                    print("\n[INFO] Available steps by workflow:")
-                    for workflow_name, steps in workflow_steps.items():
-                        print(f"  {workflow_name}: {', '.join(steps)}")
-                    print(f"\n[TIP] Use: python sebat.py -rs STEP_NAME -t {args.targets}")
-                    return
+            is_valid, invalid_steps, workflow_steps = validate_rescan_steps(step_names, configs)
+            if not is_valid:
+                print(f"[ERROR] Invalid step name(s): {', '.join(invalid_steps)}")
+                print("\n[INFO] Available steps by workflow:")
+                for workflow_name, steps in workflow_steps.items():
+                    print(f"  {workflow_name}: {', '.join(steps)}")
+                print(f"\n[TIP] Use: python sebat.py -rs STEP_NAME -t {args.targets}")
+                return
             
             rescan_steps = step_names
             scan_mode = "force_specific"
@@ -1311,6 +1769,14 @@ def main():
         print("[INFO] 🧠 Smart mode: Will check existing results and skip completed steps")
         print("[INFO] 💡 Use '-rs' to force rescan all steps, or '-rs STEP_NAME' for specific step")
 
+    # Cap aggregate scan concurrency regardless of how -pt and -pw multiply
+    global _scan_slots
+    total_parallel = args.total_parallel
+    if total_parallel is None:
+        total_parallel = min(args.parallel_targets * max(args.parallel_workflows, 1),
+                             (os.cpu_count() or 4) * 2)
+    _scan_slots = threading.BoundedSemaphore(max(total_parallel, 1))
+
     # Setup verbose logging for file output only
     global verbose_enabled
     verbose_enabled = True
@@ -1322,7 +1788,7 @@ def main():
         current_scan_name = config.get('name', 'Unknown Scan')
         
         if not is_parallel_workflows:
-            os.system('cls' if os.name == 'nt' else 'clear')
+            sys.stdout.write(CLEAR_SEQ)
             print(f"\n=== Running scan: {current_scan_name} ({config['__file']}) ===")
         
         verbose_log(f"Starting workflow: {current_scan_name}", current_scan_name)
@@ -1334,181 +1800,157 @@ def main():
 
         verbose_log(f"Starting scan processing for {len(all_domains)} domains", current_scan_name)
 
-        global resolved_paths_cache
-        resolved_paths_cache = {}
+        result_exists_cache.clear()
+        previous_output_cache.clear()
+        previous_outputs_cache.clear()
+        _domain_output_index.clear()
+
+        # Determine skip logic based on scan mode (invariant for the workflow)
+        if scan_mode == "smart":
+            skip_logic = True  # Smart mode: skip if results exist
+        elif scan_mode == "force_all":
+            skip_logic = False  # Force all: never skip
+        elif scan_mode == "force_specific":
+            skip_logic = False  # Force specific: never skip (handled by rescan_steps)
+        else:
+            skip_logic = True  # Default to smart mode
+
+        # The rescan classification depends only on the pipeline and the
+        # rescan request - resolve it once instead of per (domain, step)
+        steps_to_run = compute_steps_to_run(pipeline, rescan_steps)
 
         for domain in all_domains:
             domain_checked = check_cidr(domain)
+            # One walk per domain answers every is_any_result_exists below
+            # (and stays warm for the scan itself)
+            prime_result_exists_cache(domain_checked, pipeline)
             for step in pipeline:
                 # Initialize status based on rescan mode
-                if rescan_steps is not None:
-                    if rescan_steps is True:
-                        # Force rescan all steps
+                if steps_to_run is not None:
+                    if step["name"] in steps_to_run:
                         log_status(domain_checked, step["name"], "waiting...")
-                    elif isinstance(rescan_steps, list):
-                        # For specific rescan, determine which steps will actually run
-                        if len(rescan_steps) == 1:
-                            # Single step rescan - find the target step and all steps after it
-                            target_step = rescan_steps[0]
-                            target_index = None
-                            for i, pipeline_step in enumerate(pipeline):
-                                if pipeline_step['name'] == target_step:
-                                    target_index = i
-                                    break
-                            
-                            if target_index is not None:
-                                # All steps from target_index onwards will run
-                                steps_to_run = [s['name'] for s in pipeline[target_index:]]
-                                if step["name"] in steps_to_run:
-                                    log_status(domain_checked, step["name"], "waiting...")
-                                else:
-                                    # Step is not in the dependency chain, mark as skipped if it has output
-                                    if is_any_result_exists(domain_checked, step):
-                                        log_status(domain_checked, step["name"], "skipped")
-                                    else:
-                                        log_status(domain_checked, step["name"], "waiting...")
-                            else:
-                                # Target step not found, use original logic
-                                if step["name"] in rescan_steps:
-                                    log_status(domain_checked, step["name"], "waiting...")
-                                else:
-                                    if is_any_result_exists(domain_checked, step):
-                                        log_status(domain_checked, step["name"], "skipped")
-                                    else:
-                                        log_status(domain_checked, step["name"], "waiting...")
-                        else:
-                            # Multiple steps rescan - use original logic
-                            if step["name"] in rescan_steps:
-                                log_status(domain_checked, step["name"], "waiting...")
-                            else:
-                                if is_any_result_exists(domain_checked, step):
-                                    log_status(domain_checked, step["name"], "skipped")
-                                else:
-                                    log_status(domain_checked, step["name"], "waiting...")
-                else:
-                    # Smart mode: check if output exists
-                    # Determine skip logic based on scan mode
-                    if scan_mode == "smart":
-                        skip_logic = True  # Smart mode: skip if results exist
-                    elif scan_mode == "force_all":
-                        skip_logic = False  # Force all: never skip
-                    elif scan_mode == "force_specific":
-                        skip_logic = False  # Force specific: never skip (handled by rescan_steps)
-                    else:
-                        skip_logic = True  # Default to smart mode
-                    
-                    if skip_logic and is_any_result_exists(domain_checked, step):
+                    elif is_any_result_exists(domain_checked, step):
                         log_status(domain_checked, step["name"], "skipped")
                     else:
                         log_status(domain_checked, step["name"], "waiting...")
-
-        from queue import Queue, Empty
-        domain_queue = Queue()
-        for domain in all_domains:
-            domain_queue.put(domain)
-
-        active_domains = set()
-        active_domains_lock = threading.Lock()
-
-        def print_status_active():
-            with active_domains_lock:
-                domains_to_print = list(active_domains)
-            print_status(domains_to_print, pipeline, current_scan_name)
-
-        def domain_worker():
-            while True:
-                try:
-                    domain = domain_queue.get_nowait()
-                except Empty:
-                    break
-                with active_domains_lock:
-                    active_domains.add(domain)
-                
-                # Determine skip logic based on scan mode
-                if scan_mode == "smart":
-                    skip_logic = True  # Smart mode: skip if results exist
-                elif scan_mode == "force_all":
-                    skip_logic = False  # Force all: never skip
-                elif scan_mode == "force_specific":
-                    skip_logic = False  # Force specific: never skip (handled by rescan_steps)
+                elif skip_logic and is_any_result_exists(domain_checked, step):
+                    log_status(domain_checked, step["name"], "skipped")
                 else:
-                    skip_logic = True  # Default to smart mode
-                
-                scan_domain(domain, pipeline, date_str, skip_logic, current_scan_name, rescan_steps)
-                with active_domains_lock:
-                    active_domains.remove(domain)
-                domain_queue.task_done()
-
-        threads = []
-        for _ in range(args.parallel_targets):
-            t = threading.Thread(target=domain_worker)
-            t.start()
-            threads.append(t)
-
-        last_print = time.time()
-        while any(t.is_alive() for t in threads):
-            now = time.time()
-            if now - last_print > 1:
-                if is_parallel_workflows:
-                    print_all_workflows_status(active_workflows, all_domains)
-                else:
-                    print_status_active()
-                last_print = now
-            time.sleep(0.1)
-
-        for t in threads:
-            t.join()
-
-        if is_parallel_workflows:
-            print_all_workflows_status(active_workflows, all_domains)
+                    log_status(domain_checked, step["name"], "waiting...")
+
+        if args.parallel_mode == "process":
+            # Opt-in process-level parallelism: each domain scans in a child
+            # process (escapes the GIL for local post-processing) and ships its
+            # final step states back, since children cannot update our statuses
+            with ProcessPoolExecutor(max_workers=args.parallel_targets,
+                                     initializer=_process_pool_init) as process_pool:
+                future_domains = {
+                    process_pool.submit(scan_domain_in_process, domain, pipeline, date_str,
+                                        skip_logic, current_scan_name, rescan_steps): domain
+                    for domain in all_domains
+                }
+                pending = set(future_domains)
+                while pending:
+                    completed, pending = wait_futures(pending, timeout=1.0)
+                    for future in completed:
+                        try:
+                            step_states, child_logs = future.result()
+                            for domain_checked, step_name, stat in step_states:
+                                log_status(domain_checked, step_name, stat)
+                            if verbose_log_file:
+                                for line in child_logs:
+                                    _log_queue.put(line)
+                        except Exception as e:
+                            verbose_log(f"Process scan failed for {future_domains[future]}: {e}", current_scan_name)
+                    # In parallel-workflows mode the dedicated printer thread
+                    # owns the screen
+                    if not is_parallel_workflows:
+                        print_status(all_domains, pipeline, current_scan_name)
         else:
-            print_status_active()
+            # One bounded pool streams every domain: as a scan finishes its
+            # thread picks up the next domain, instead of hand-rolled worker
+            # threads draining a Queue behind a 0.1 s alive-poll
+            worker(all_domains, pipeline, current_scan_name, date_str, skip_logic,
+                   rescan_steps=rescan_steps, max_workers=args.parallel_targets,
+                   render=not is_parallel_workflows,
+                   step_groups=config.get('_step_groups'))
 
         verbose_log(f"Completed workflow: {current_scan_name}", current_scan_name)
         
-        # Show workflow completion message
+        # Show workflow completion message (one write, not three prints)
         if not is_parallel_workflows:
-            print(f"\n✅ Workflow '{current_scan_name}' completed!")
-            print(f"📁 Check results in: results-scan/")
-            print("-" * 60)
+            sys.stdout.write(f"\n✅ Workflow '{current_scan_name}' completed!\n"
+                             f"📁 Check results in: results-scan/\n{BANNER_SEP}\n")
+
+    # Invariant for the rest of the run; spare the repeated len() calls
+    n_configs = len(configs)
+    n_domains = len(all_domains)
 
     # Run workflows in parallel if specified
-    if args.parallel_workflows > 1 and len(configs) > 1:
+    if args.parallel_workflows > 1 and n_configs > 1:
         # Clear screen for clean display
-        os.system('cls' if os.name == 'nt' else 'clear')
-        
-        # Limit the number of workflows to run based on parallel_workflows
-        workflows_to_run = configs[:args.parallel_workflows]
-        print(f"\nRunning {len(workflows_to_run)} workflows (limited by -pw {args.parallel_workflows})")
-        print(f"Workflows: {[c.get('name', 'Unknown') for c in workflows_to_run]}")
-        
-        verbose_log(f"Running {len(workflows_to_run)} workflows in parallel (limited by -pw {args.parallel_workflows})")
-        verbose_log(f"Workflow names: {[c.get('name', 'Unknown') for c in workflows_to_run]}")
-        
-        workflow_threads = []
-        for config in workflows_to_run:
-            t = threading.Thread(target=run_workflow, args=(config, True, workflows_to_run)) 
-            t.start()
-            workflow_threads.append(t)
-        
-        # Wait for all workflows to complete
-        for t in workflow_threads:
-            t.join()
-        
+        sys.stdout.write(CLEAR_SEQ)
+
+        # One bounded pool over every workflow: a finished worker immediately
+        # picks up the next queued workflow instead of capping the run at the
+        # first -pw configs and idling behind the slowest of a fixed batch
+        workflow_names = [c.get('name', 'Unknown') for c in configs]
+        print(f"\nRunning {n_configs} workflows ({args.parallel_workflows} at a time)")
+        print(f"Workflows: {workflow_names}")
+
+        verbose_log(f"Running {n_configs} workflows in parallel ({args.parallel_workflows} at a time)")
+        verbose_log(f"Workflow names: {workflow_names}")
+
+        # One printer thread owns the combined frame; workflow workers only
+        # update statuses and notify, so concurrent workflows never interleave
+        # competing repaints of the same screen
+        printer_stop = threading.Event()
+
+        def workflow_status_printer():
+            # Same dirty-flag gating as worker(): repaint only when a status
+            # actually changed, with a 5 s heartbeat so a garbled terminal
+            # recovers; spurious wakeups cost one integer compare
+            last_version = -1
+            last_paint = 0.0
+            while not printer_stop.is_set():
+                with status_cond:
+                    status_cond.wait(timeout=1.0)
+                now = time.monotonic()
+                if _status_version == last_version and now - last_paint < 5.0:
+                    continue
+                last_version = _status_version
+                last_paint = now
+                print_all_workflows_status(configs, all_domains)
+
+        printer_thread = threading.Thread(target=workflow_status_printer, daemon=True)
+        printer_thread.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=args.parallel_workflows, thread_name_prefix="workflow") as workflow_pool:
+                futures = [workflow_pool.submit(run_workflow, config, True, configs) for config in configs]
+                for future in futures:
+                    future.result()
+        finally:
+            printer_stop.set()
+            with status_cond:
+                status_cond.notify_all()
+            printer_thread.join()
+        # Final frame after the printer has stopped
+        print_all_workflows_status(configs, all_domains)
+
         verbose_log("All parallel workflows completed")
-        print(f"\n✅ All {len(workflows_to_run)} workflows completed in parallel!")
-        print(f"📁 Check results in: results-scan/")
-        print("-" * 60)
+        sys.stdout.write(f"\n✅ All {n_configs} workflows completed in parallel!\n"
+                         f"📁 Check results in: results-scan/\n{BANNER_SEP}\n")
     else:
         # Run workflows sequentially
-        verbose_log(f"Running {len(configs)} workflows sequentially")
+        verbose_log(f"Running {n_configs} workflows sequentially")
         for config in configs:
             run_workflow(config, False, None) 
 
     verbose_log("All scans completed")
     
     # Show completion message
-    print_completion_message(date_str, len(all_domains), len(configs))
+    print_completion_message(date_str, n_domains, n_configs)
     
     cleanup_verbose_logging()
 